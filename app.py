@@ -1,7 +1,7 @@
+import os
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 
 # -----------------------------------------------------------------------------
 # 1. CONFIGURATION
@@ -28,48 +28,147 @@ st.markdown("""
 # -----------------------------------------------------------------------------
 # 2. DATA PROCESSING
 # -----------------------------------------------------------------------------
-@st.cache_data
-def load_data():
-    try:
-        # Load the uploaded file
-        df = pd.read_csv("extracted_ifct_data.csv")
-        
-        # 1. Generate 'Group' column from IFCT Code (First Letter)
-        code_map = {
-            'A': 'Cereals & Millets', 'B': 'Grain Legumes', 'C': 'Green Leafy Veg',
-            'D': 'Other Veg', 'E': 'Fruits', 'F': 'Roots & Tubers',
-            'G': 'Condiments & Spices', 'H': 'Nuts & Oil Seeds', 'I': 'Sugars',
-            'J': 'Mushrooms', 'K': 'Misc', 'L': 'Milk & Dairy',
-            'M': 'Egg Products', 'N': 'Poultry', 'O': 'Animal Meat',
-            'P': 'Marine Fish', 'Q': 'Marine Shellfish', 'R': 'Marine Mollusks',
-            'S': 'Freshwater Fish'
-        }
-        
-        # Extract first letter of code (e.g., 'A001' -> 'A')
-        df['Group_Code'] = df['code'].astype(str).str[0].str.upper()
-        df['Group'] = df['Group_Code'].map(code_map).fillna('Other')
-        
-        # 2. Clean Numeric Columns (Fill NaNs with 0 for plotting)
-        numeric_cols = df.select_dtypes(include=['number']).columns
-        df[numeric_cols] = df[numeric_cols].fillna(0)
-        
-        return df
-        
-    except FileNotFoundError:
-        st.error("File 'extracted_ifct_data.csv' not found. Please make sure it is in the same folder.")
-        return pd.DataFrame()
+# Columns referenced by the app (projection pushdown: only these are read)
+NEEDED_COLS = [
+    'code', 'name', 'scie', 'regn', 'enerc',
+    # Macros
+    'protcnt', 'choavldf', 'fatce', 'fibtg', 'starch', 'fsugar', 'fibsol', 'fibins',
+    # Minerals
+    'ca', 'mg', 'p', 'na', 'k', 'fe', 'zn', 'cu', 'mn',
+    # Vitamins
+    'vitc', 'folsum', 'thia', 'ribf', 'nia', 'pantac', 'vitb6c',
+    'retol', 'ergcal', 'chocal', 'vite', 'tocpha', 'vitk1', 'vitk2',
+    # Fats
+    'fasat', 'fams', 'fapu', 'cholc', 'ala',
+    # Amino Acids
+    'arg', 'his', 'ile', 'leu', 'lys', 'met', 'phe', 'thr', 'trp', 'val',
+    # Bioactives
+    'polyph', 'gallac', 'querce', 'phytac', 'oxalt', 'sapon',
+]
+
+# Food group by first letter of the IFCT code
+CODE_MAP = {
+    'A': 'Cereals & Millets', 'B': 'Grain Legumes', 'C': 'Green Leafy Veg',
+    'D': 'Other Veg', 'E': 'Fruits', 'F': 'Roots & Tubers',
+    'G': 'Condiments & Spices', 'H': 'Nuts & Oil Seeds', 'I': 'Sugars',
+    'J': 'Mushrooms', 'K': 'Misc', 'L': 'Milk & Dairy',
+    'M': 'Egg Products', 'N': 'Poultry', 'O': 'Animal Meat',
+    'P': 'Marine Fish', 'Q': 'Marine Shellfish', 'R': 'Marine Mollusks',
+    'S': 'Freshwater Fish'
+}
+GROUPS = sorted(set(CODE_MAP.values()) | {'Other'})
+ALL_GROUPS = ["All"] + GROUPS
+
+# Per-tab value columns, pre-extracted into dense float32 matrices (one row per food)
+MACRO_KEYS = ['protcnt', 'choavldf', 'fatce', 'fibtg']
+MINERAL_KEYS = ['ca', 'mg', 'p', 'na', 'k']
+MINERAL_LABELS = ("Calcium", "Magnesium", "Phosphorus", "Sodium", "Potassium")
+TRACE_KEYS = ['fe', 'zn', 'cu', 'mn']
+TRACE_LABELS = ("Iron", "Zinc", "Copper", "Manganese")
+FAT_KEYS = ['fasat', 'fams', 'fapu']
+FAT_LABELS = ("Saturated (SFA)", "Monounsat (MUFA)", "Polyunsat (PUFA)")
+AA_KEYS = ['arg', 'his', 'ile', 'leu', 'lys', 'met', 'phe', 'thr', 'trp', 'val']
+AA_LABELS = ("Arg", "His", "Ile", "Leu", "Lys", "Met", "Phe", "Thr", "Trp", "Val")
+
+# Everything load_data reads besides the file; passed in so edits invalidate the disk cache
+CACHE_VERSION = (
+    tuple(NEEDED_COLS), tuple(CODE_MAP.items()),
+    tuple(MACRO_KEYS), tuple(MINERAL_KEYS), tuple(TRACE_KEYS), tuple(FAT_KEYS), tuple(AA_KEYS),
+)
+
+# The disk cache is keyed on the file's mtime (regenerating it with convert_data.py
+# invalidates it) and on CACHE_VERSION
+@st.cache_data(persist="disk", show_spinner=False)
+def load_data(path, mtime, cache_version):
+    import polars as pl
+    import polars.selectors as cs
+    
+    # Lazy Polars pipeline over the pre-converted Parquet file (see convert_data.py);
+    # projection, string ops and the fill/cast pass are fused into one collect()
+    lf = pl.scan_parquet(path).select(NEEDED_COLS)
+
+    # 1. Clean Numeric Columns (Fill nulls with 0 for plotting, float32 for measurements)
+    lf = lf.with_columns(
+        cs.float().fill_null(0).cast(pl.Float32),
+        cs.integer().fill_null(0),
+    )
+
+    # 2. Generate 'Group' column from IFCT Code (First Letter), e.g. 'A001' -> 'A'
+    lf = lf.with_columns(
+        pl.col('code').fill_null('').str.slice(0, 1).str.to_uppercase().alias('Group_Code')
+    )
+    lf = lf.with_columns(
+        pl.col('Group_Code').replace_strict(CODE_MAP, default='Other', return_dtype=pl.Enum(GROUPS)).alias('Group'),
+        pl.col('Group_Code').cast(pl.Categorical),
+    )
+
+    # 3. Category dtype for repeated labels
+    lf = lf.with_columns(
+        pl.col('name', 'scie').cast(pl.Categorical),
+        pl.col('regn').cast(pl.String).cast(pl.Categorical),
+    )
+
+    df = lf.collect().to_pandas()
+
+    # Vitamin totals shown in the Vitamins tab
+    df['vitd_total'] = df['ergcal'] + df['chocal']
+    df['vite_total'] = df['vite'] + df['tocpha']
+    df['vitk_total'] = df['vitk1'] + df['vitk2']
+
+    # 4. Lookup maps, cached and invalidated together with the frame
+    first = df.drop_duplicates('name')
+    groups_to_names = df.groupby('Group', observed=True)['name'].unique().apply(tuple).to_dict()
+    groups_to_names["All"] = tuple(df['name'].unique())
+    lookups = {
+        # name -> row dict (first occurrence wins, matching the old .iloc[0] lookup)
+        'name_to_item': dict(zip(first['name'], first.to_dict(orient='records'))),
+        # name -> row position into the per-tab value matrices
+        'name_to_row': {name: row for row, name in zip(first.index, first['name'])},
+        # group -> food names, in file order ("All" covers every food)
+        'groups_to_names': groups_to_names,
+    }
 
-df = load_data()
+    # 5. Per-tab value matrices, indexed by row position
+    matrices = {
+        'macro': df[MACRO_KEYS].to_numpy(dtype=np.float32),
+        'mineral': df[MINERAL_KEYS].to_numpy(dtype=np.float32),
+        'trace': df[TRACE_KEYS].to_numpy(dtype=np.float32),
+        'fat': df[FAT_KEYS].to_numpy(dtype=np.float32),
+        'aa': df[AA_KEYS].to_numpy(dtype=np.float32),
+    }
+
+    return df, lookups, matrices
+
+# Errors aren't cached, so a missing file is retried on the next run
+try:
+    df, lookups, matrices = load_data("ifct.parquet", os.path.getmtime("ifct.parquet"), CACHE_VERSION)
+except FileNotFoundError:
+    st.error("File 'ifct.parquet' not found. Run convert_data.py to generate it from the CSV.")
+    df, lookups, matrices = pd.DataFrame(), {}, {}
 
 # -----------------------------------------------------------------------------
 # 3. HELPER FUNCTIONS
 # -----------------------------------------------------------------------------
+# Semi-transparent fill for each radar line color
+RADAR_FILL = {
+    "#FF7F50": "rgba(255, 127, 80, 0.3)",
+    "#ADFF2F": "rgba(173, 255, 47, 0.3)",
+}
+
+# Figures are cached on their (hashable) scalar/tuple inputs, so reruns for the
+# same food reuse the built figure instead of reconstructing it. Plotly is
+# imported inside each helper so script start-up doesn't pay for it.
+# go figures are never mutated after return, so they use cache_resource and are
+# shared as-is; a cache_data hit (unpickle + re-validate) costs more than a rebuild.
+@st.cache_resource
 def plot_radar(values, labels, title, color):
+    import plotly.graph_objects as go
+    
     fig = go.Figure()
     fig.add_trace(go.Scatterpolar(
-        r=values, theta=labels, fill='toself', name=title,
+        r=list(values), theta=list(labels), fill='toself', name=title,
         line=dict(color=color),
-        fillcolor=f"rgba{tuple(int(color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4)) + (0.3,)}"
+        fillcolor=RADAR_FILL[color]
     ))
     fig.update_layout(
         polar=dict(radialaxis=dict(visible=True, showticklabels=False)),
@@ -81,32 +180,155 @@ def plot_radar(values, labels, title, color):
     )
     return fig
 
+@st.cache_data
+def macro_pie(protein, carbs, fat):
+    import plotly.express as px
+    
+    fig = px.pie(
+        names=['Protein', 'Carbs', 'Fat'],
+        values=[protein, carbs, fat],
+        hole=0.6,
+        color_discrete_sequence=['#4CAF50', '#FFC107', '#F44336']
+    )
+    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white'), height=300)
+    return fig
+
+@st.cache_resource
+def mineral_bar(values, labels, color):
+    import plotly.graph_objects as go
+    
+    fig = go.Figure(go.Bar(x=list(labels), y=list(values), marker_color=color))
+    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='white'), yaxis_title="mg")
+    return fig
+
+def markdown_table(label_header, value_header, rows):
+    # Tiny fixed-shape tables render as plain Markdown (no Arrow/grid component)
+    lines = [f"| {label_header} | {value_header} |", "|---|---|"]
+    lines += [f"| {label} | {value:g} |" for label, value in rows]
+    return "\n".join(lines)
+
+# -----------------------------------------------------------------------------
+# 4. TAB RENDERERS
+# -----------------------------------------------------------------------------
+# Each tab body is a fragment, so interactions inside one tab rerun only that tab
+@st.fragment
+def render_macros(item, row):
+    protein, carbs, fat, fiber = matrices['macro'][row].tolist()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Protein", f"{protein:g} g")
+    c2.metric("Carbs (Avail)", f"{carbs:g} g")
+    c3.metric("Total Fat", f"{fat:g} g")
+    c4.metric("Fiber", f"{fiber:g} g")
+    
+    st.write("")
+    col_chart, col_details = st.columns(2)
+    with col_chart:
+        st.plotly_chart(macro_pie(protein, carbs, fat), use_container_width=True)
+    
+    with col_details:
+        st.markdown("#### Carbohydrate Breakdown")
+        st.markdown(markdown_table("Component", "Value (g)", [
+            ("Starch", item.get('starch', 0)), ("Total Sugars", item.get('fsugar', 0)),
+            ("Soluble Fiber", item.get('fibsol', 0)), ("Insoluble Fiber", item.get('fibins', 0))
+        ]))
+
+@st.fragment
+def render_minerals(item, row):
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("#### Macro Minerals (mg)")
+        mins = tuple(matrices['mineral'][row].tolist())
+        st.plotly_chart(mineral_bar(mins, MINERAL_LABELS, "#D4AF37"), use_container_width=True)
+    
+    with c2:
+        st.markdown("#### Trace Elements (mg)")
+        trace = tuple(matrices['trace'][row].tolist())
+        st.plotly_chart(mineral_bar(trace, TRACE_LABELS, "#FF6347"), use_container_width=True)
+
+@st.fragment
+def render_vitamins(item, row):
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("#### Water Soluble")
+        st.metric("Vitamin C", f"{item['vitc']:g} mg")
+        st.metric("Total Folates", f"{item.get('folsum', 0):g} µg")
+        
+        st.markdown(markdown_table("Vitamin", "Value (mg)", [
+            ("Thiamin (B1)", item['thia']), ("Riboflavin (B2)", item['ribf']),
+            ("Niacin (B3)", item['nia']), ("Pantothenic (B5)", item.get('pantac', 0)),
+            ("Vitamin B6", item.get('vitb6c', 0))
+        ]))
+
+    with c2:
+        st.markdown("#### Fat Soluble")
+        st.metric("Vitamin A (Retinol)", f"{item.get('retol', 0):g} µg")
+        st.metric("Vitamin D2+D3", f"{item['vitd_total']:g} µg")
+        st.metric("Vitamin E", f"{item['vite_total']:g} mg")
+        st.metric("Vitamin K", f"{item['vitk_total']:g} µg")
+
+@st.fragment
+def render_fats(item, row):
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("#### Fat Composition")
+        fat_values = tuple(matrices['fat'][row].tolist())
+        st.plotly_chart(plot_radar(fat_values, FAT_LABELS, "Fatty Acids", "#FF7F50"), use_container_width=True)
+    
+    with c2:
+        st.markdown("#### Lipid Health")
+        st.metric("Cholesterol", f"{item.get('cholc', 0):g} mg")
+        st.metric("Omega-3 (Alpha-Linolenic)", f"{item.get('ala', 0):g} mg")
+
+@st.fragment
+def render_amino_acids(item, row):
+    st.markdown("#### Essential Amino Acids (mg/g N)")
+    aa_values = tuple(matrices['aa'][row].tolist())
+    
+    st.plotly_chart(plot_radar(aa_values, AA_LABELS, "Amino Profile", "#ADFF2F"), use_container_width=True)
+
+@st.fragment
+def render_bioactives(item, row):
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("#### Polyphenols & Antioxidants")
+        st.metric("Total Polyphenols", f"{item.get('polyph', 0):g} mg")
+        # Add specific phenols if available in your CSV
+        st.write("**Specific Phenolics:**")
+        st.write(f"- Gallic Acid: {item.get('gallac', 0):g} mg")
+        st.write(f"- Quercetin: {item.get('querce', 0):g} mg")
+    
+    with c2:
+        st.markdown("#### Anti-Nutrients")
+        st.metric("Phytate", f"{item.get('phytac', 0):g} mg")
+        st.metric("Total Oxalates", f"{item.get('oxalt', 0):g} mg")
+        st.metric("Saponins", f"{item.get('sapon', 0):g} mg")
+
 # -----------------------------------------------------------------------------
-# 4. APP LAYOUT
+# 5. APP LAYOUT
 # -----------------------------------------------------------------------------
 if not df.empty:
+    index = lookups['name_to_item']
+    name_to_row = lookups['name_to_row']
+    groups_to_names = lookups['groups_to_names']
+    
     with st.sidebar:
         st.title("🥗 IFCT Explorer")
         st.caption(f"Loaded {len(df)} items from database")
         st.markdown("---")
         
         # Filter Logic
-        all_groups = ["All"] + sorted(list(df['Group'].unique()))
-        selected_group = st.selectbox("Filter by Group", all_groups)
+        selected_group = st.selectbox("Filter by Group", ALL_GROUPS)
         
-        if selected_group != "All":
-            filtered_df = df[df['Group'] == selected_group]
-        else:
-            filtered_df = df
-            
-        selected_item = st.selectbox("Select Food Item", filtered_df['name'].unique())
+        names = groups_to_names.get(selected_group, ())
+        selected_item = st.selectbox("Select Food Item", names)
         
         st.markdown("---")
         st.info("Displaying IFCT 2017 Standard Data per 100g edible portion.")
 
     # Main Content
     if selected_item:
-        item = df[df['name'] == selected_item].iloc[0]
+        item = index[selected_item]
+        row = name_to_row[selected_item]
         
         # Header
         c1, c2 = st.columns([3, 1])
@@ -117,117 +339,39 @@ if not df.empty:
         st.markdown("---")
 
         # Tabs
-        tabs = st.tabs(["🍽️ Macros", "💎 Minerals", "💊 Vitamins", "💧 Fats", "🧬 Amino Acids", "🌿 Bioactives"])
+        # Tabs track the active label in st.session_state.active_tab; only the
+        # open tab's body runs on each rerun
+        tabs = st.tabs(
+            ["🍽️ Macros", "💎 Minerals", "💊 Vitamins", "💧 Fats", "🧬 Amino Acids", "🌿 Bioactives"],
+            key="active_tab", on_change="rerun"
+        )
 
         # --- TAB 1: MACROS ---
         with tabs[0]:
-            c1, c2, c3, c4 = st.columns(4)
-            c1.metric("Protein", f"{item['protcnt']} g")
-            c2.metric("Carbs (Avail)", f"{item['choavldf']} g")
-            c3.metric("Total Fat", f"{item['fatce']} g")
-            c4.metric("Fiber", f"{item['fibtg']} g")
-            
-            st.write("")
-            col_chart, col_details = st.columns(2)
-            with col_chart:
-                fig = px.pie(
-                    names=['Protein', 'Carbs', 'Fat'],
-                    values=[item['protcnt'], item['choavldf'], item['fatce']],
-                    hole=0.6,
-                    color_discrete_sequence=['#4CAF50', '#FFC107', '#F44336']
-                )
-                fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white'), height=300)
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with col_details:
-                st.markdown("#### Carbohydrate Breakdown")
-                st.dataframe(pd.DataFrame({
-                    "Component": ["Starch", "Total Sugars", "Soluble Fiber", "Insoluble Fiber"],
-                    "Value (g)": [item.get('starch', 0), item.get('fsugar', 0), item.get('fibsol', 0), item.get('fibins', 0)]
-                }), hide_index=True, use_container_width=True)
+            if tabs[0].open:
+                render_macros(item, row)
 
         # --- TAB 2: MINERALS ---
         with tabs[1]:
-            c1, c2 = st.columns(2)
-            with c1:
-                st.markdown("#### Macro Minerals (mg)")
-                mins = {
-                    "Calcium": item['ca'], "Magnesium": item['mg'], 
-                    "Phosphorus": item['p'], "Sodium": item['na'], "Potassium": item['k']
-                }
-                st.bar_chart(pd.Series(mins), color="#D4AF37")
-            
-            with c2:
-                st.markdown("#### Trace Elements (mg)")
-                trace = {
-                    "Iron": item['fe'], "Zinc": item['zn'], 
-                    "Copper": item['cu'], "Manganese": item['mn']
-                }
-                fig_trace = px.bar(x=list(trace.keys()), y=list(trace.values()), color_discrete_sequence=['#FF6347'])
-                fig_trace.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='white'), yaxis_title="mg")
-                st.plotly_chart(fig_trace, use_container_width=True)
+            if tabs[1].open:
+                render_minerals(item, row)
 
         # --- TAB 3: VITAMINS ---
         with tabs[2]:
-            c1, c2 = st.columns(2)
-            with c1:
-                st.markdown("#### Water Soluble")
-                st.metric("Vitamin C", f"{item['vitc']} mg")
-                st.metric("Total Folates", f"{item.get('folsum', 0)} µg")
-                
-                b_vits = {
-                    "Thiamin (B1)": item['thia'], "Riboflavin (B2)": item['ribf'], 
-                    "Niacin (B3)": item['nia'], "Pantothenic (B5)": item.get('pantac', 0),
-                    "Vitamin B6": item.get('vitb6c', 0)
-                }
-                st.dataframe(pd.DataFrame(list(b_vits.items()), columns=["Vitamin", "Value (mg)"]), hide_index=True, use_container_width=True)
-
-            with c2:
-                st.markdown("#### Fat Soluble")
-                st.metric("Vitamin A (Retinol)", f"{item.get('retol', 0)} µg")
-                st.metric("Vitamin D2+D3", f"{item.get('ergcal', 0) + item.get('chocal', 0)} µg")
-                st.metric("Vitamin E", f"{item.get('vite', 0) + item.get('tocpha', 0)} mg")
-                st.metric("Vitamin K", f"{item.get('vitk1', 0) + item.get('vitk2', 0)} µg")
+            if tabs[2].open:
+                render_vitamins(item, row)
 
         # --- TAB 4: FATS ---
         with tabs[3]:
-            c1, c2 = st.columns(2)
-            with c1:
-                st.markdown("#### Fat Composition")
-                fats = {
-                    "Saturated (SFA)": item.get('fasat', 0),
-                    "Monounsat (MUFA)": item.get('fams', 0),
-                    "Polyunsat (PUFA)": item.get('fapu', 0)
-                }
-                st.plotly_chart(plot_radar(list(fats.values()), list(fats.keys()), "Fatty Acids", "#FF7F50"), use_container_width=True)
-            
-            with c2:
-                st.markdown("#### Lipid Health")
-                st.metric("Cholesterol", f"{item.get('cholc', 0)} mg")
-                st.metric("Omega-3 (Alpha-Linolenic)", f"{item.get('ala', 0)} mg")
+            if tabs[3].open:
+                render_fats(item, row)
 
         # --- TAB 5: AMINO ACIDS ---
         with tabs[4]:
-            st.markdown("#### Essential Amino Acids (mg/g N)")
-            aa_labels = ["Arg", "His", "Ile", "Leu", "Lys", "Met", "Phe", "Thr", "Trp", "Val"]
-            aa_keys = ['arg', 'his', 'ile', 'leu', 'lys', 'met', 'phe', 'thr', 'trp', 'val']
-            aa_values = [item.get(k, 0) for k in aa_keys]
-            
-            st.plotly_chart(plot_radar(aa_values, aa_labels, "Amino Profile", "#ADFF2F"), use_container_width=True)
+            if tabs[4].open:
+                render_amino_acids(item, row)
 
         # --- TAB 6: BIOACTIVES ---
         with tabs[5]:
-            c1, c2 = st.columns(2)
-            with c1:
-                st.markdown("#### Polyphenols & Antioxidants")
-                st.metric("Total Polyphenols", f"{item.get('polyph', 0)} mg")
-                # Add specific phenols if available in your CSV
-                st.write("**Specific Phenolics:**")
-                st.write(f"- Gallic Acid: {item.get('gallac', 0)} mg")
-                st.write(f"- Quercetin: {item.get('querce', 0)} mg")
-            
-            with c2:
-                st.markdown("#### Anti-Nutrients")
-                st.metric("Phytate", f"{item.get('phytac', 0)} mg")
-                st.metric("Total Oxalates", f"{item.get('oxalt', 0)} mg")
-                st.metric("Saponins", f"{item.get('sapon', 0)} mg")
\ No newline at end of file
+            if tabs[5].open:
+                render_bioactives(item, row)
\ No newline at end of file
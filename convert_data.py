@@ -0,0 +1,11 @@
+import pandas as pd
+
+# -----------------------------------------------------------------------------
+# One-off conversion: extracted_ifct_data.csv -> ifct.parquet
+# Re-run this whenever the CSV is updated, then commit the Parquet file.
+# -----------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Declare 'code' as a string column so the Parquet schema never infers it as numeric
+    df = pd.read_csv("extracted_ifct_data.csv", dtype={'code': 'string[pyarrow]'})
+    df.to_parquet("ifct.parquet", engine="pyarrow", index=False)
+    print(f"Wrote {len(df)} rows x {len(df.columns)} columns to ifct.parquet")